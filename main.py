@@ -1,9 +1,84 @@
 import gi
 import os
 import math
+from math import pi, cos, sin, atan2
 import json
+import time
+import threading
+import concurrent.futures
+import functools
+import urllib.parse
+import cairo
+import numpy as np
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk, Gdk, GdkPixbuf, Pango, GLib
+from gi.repository import Gtk, Gdk, GdkPixbuf, Gio, Pango, GLib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Minimum time between motion-driven redraws (~120 Hz)
+MOTION_REDRAW_INTERVAL_NS = 8_000_000
+
+# Stroke points are stored as packed single-precision pairs; cairo gets
+# Python floats (doubles) when a path is built
+POINT_DTYPE = np.float32
+
+# Pointer samples closer than this many screen pixels to the last point are dropped
+MIN_POINT_DISTANCE = 1.5
+
+# A point lying on the line between its neighbours (twice the triangle area,
+# in screen pixels squared, below this value) is redundant
+COLLINEAR_TOLERANCE = 0.5
+
+# Finished strokes are simplified so that no dropped point was further than
+# this many screen pixels from the kept polyline
+SIMPLIFY_TOLERANCE = 0.5
+
+# Single-point strokes narrower than this on screen are filled as squares,
+# which is indistinguishable from a round dot at that size
+SMALL_DOT_SIZE = 4
+
+# Extra pixels rendered around the viewport in the committed-content cache,
+# so short pans can be served from it without re-rendering
+CACHE_MARGIN = 256
+
+TAU = 2 * pi  # full turn in radians
+
+# Arrow head legs, in world units and radians from the shaft
+ARROW_HEAD_LENGTH = 15
+ARROW_HEAD_ANGLE = pi / 6  # 30 degrees
+
+# Spline points generated between each pair of stroke points
+STROKE_SPLINE_SEGMENTS = 5
+
+# Scratch context for building cairo paths outside of a draw handler
+_path_context = cairo.Context(cairo.RecordingSurface(cairo.CONTENT_ALPHA, None))
+
+
+# Catmull-Rom basis weights for each num_segments, see catmull_rom_weights()
+_spline_weights = {}
+
+
+def catmull_rom_weights(num_segments):
+    """
+    Return the (num_segments, 4) matrix of Catmull-Rom basis weights for
+    t = 1/num_segments .. 1, applied to the control points p0..p3.
+    """
+    weights = _spline_weights.get(num_segments)
+    if weights is None:
+        t = np.arange(1, num_segments + 1) / num_segments
+        t2 = t * t
+        t3 = t2 * t
+        weights = 0.5 * np.stack((
+            -t + 2 * t2 - t3,
+            2 - 5 * t2 + 3 * t3,
+            t + 4 * t2 - 3 * t3,
+            -t2 + t3,
+        ), axis=1)
+        _spline_weights[num_segments] = weights
+    return weights
 
 
 def catmull_rom_spline(points, num_segments=10):
@@ -14,40 +89,236 @@ def catmull_rom_spline(points, num_segments=10):
     if len(points) < 4:
         return points
 
-    smoothed = []
+    pts = np.asarray(points, dtype=np.float64)
+
+    # Keep the first point and the last two points, as the segments only
+    # span p1..p(n-2)
+    curve = catmull_rom_segments(pts, num_segments)
+    return np.concatenate((pts[:1], curve, pts[-2:])).tolist()
+
+
+def _catmull_rom_loops(pts, weights, out):
+    # Same product as the NumPy path, without its temporaries; the live
+    # stroke evaluates a few segments per frame, where those dominate.
+    # Compiled by load_spline_kernel(), too slow to call as plain Python
+    num_segments = weights.shape[0]
+    for m in range(pts.shape[0] - 3):
+        for s in range(num_segments):
+            w0, w1, w2, w3 = weights[s, 0], weights[s, 1], weights[s, 2], weights[s, 3]
+            row = m * num_segments + s
+            for d in range(2):
+                out[row, d] = (w0 * pts[m, d] + w1 * pts[m + 1, d] +
+                               w2 * pts[m + 2, d] + w3 * pts[m + 3, d])
+
+
+# numba-compiled _catmull_rom_loops, or None until load_spline_kernel() succeeds
+_catmull_rom_kernel = None
+
+
+def load_spline_kernel():
+    """
+    Import numba and compile the spline kernel, or load it from numba's
+    on-disk cache. Both are slow, so this runs from a low-priority idle
+    callback at startup; splines use NumPy until it has run, and always
+    when numba isn't installed. Returns False to run only once.
+    """
+    global _catmull_rom_kernel
+    try:
+        import numba
+    except ImportError:
+        return False
+    # An explicit signature compiles now rather than on the first call
+    _catmull_rom_kernel = numba.njit(
+        'void(float64[:, :], float64[:, :], float64[:, :])',
+        cache=True, fastmath=True)(_catmull_rom_loops)
+    return False
+
+
+def catmull_rom_segments(points, num_segments):
+    """
+    Return the (M * num_segments, 2) array of spline points for the M = n - 3
+    segments of an (n, 2) array of control points, without the end points.
+    Uses the compiled kernel once load_spline_kernel() has loaded it.
+    """
+    pts = np.asarray(points, dtype=np.float64)
+
+    kernel = _catmull_rom_kernel
+    if kernel is not None:
+        out = np.empty(((len(pts) - 3) * num_segments, 2))
+        kernel(pts, catmull_rom_weights(num_segments), out)
+        return out
+
+    # (M, 4, 2) control point windows, one per spline segment
+    windows = np.stack((pts[:-3], pts[1:-2], pts[2:-1], pts[3:]), axis=1)
+
+    # (S, 4) @ (M, 4, 2) -> (M, S, 2) points along every segment at once
+    return (catmull_rom_weights(num_segments) @ windows).reshape(-1, 2)
+
+
+def simplify_polyline(points, tolerance):
+    """
+    Simplify an (n, 2) array of points with the Douglas-Peucker algorithm.
+    Returns a new array of the kept points; the end points are always kept.
+    """
+    n = len(points)
+    if n < 3:
+        return points.copy()
+
+    pts = points.astype(np.float64)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    # Iterative so long strokes cannot hit the recursion limit
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        ax, ay = pts[i]
+        bx, by = pts[j] - pts[i]
+        rel = pts[i + 1:j] - (ax, ay)
+        length = math.hypot(bx, by)
+        if length > 0:
+            dist = np.abs(bx * rel[:, 1] - by * rel[:, 0]) / length
+        else:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        k = int(np.argmax(dist))
+        if dist[k] > tolerance:
+            k += i + 1
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+
+    return points[keep]
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
-    # Add first point
-    smoothed.append(points[0])
 
-    for i in range(len(points) - 3):
-        p0 = points[i]
-        p1 = points[i + 1]
-        p2 = points[i + 2]
-        p3 = points[i + 3]
+def dump_json(obj):
+    """Serialize obj to UTF-8 JSON bytes. NumPy arrays are written as nested lists."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_json_default).encode()
 
-        for t in range(1, num_segments + 1):
-            t_norm = t / num_segments
-            t2 = t_norm * t_norm
-            t3 = t2 * t_norm
 
-            # Catmull-Rom spline formula
-            x = 0.5 * ((2 * p1[0]) +
-                      (-p0[0] + p2[0]) * t_norm +
-                      (2 * p0[0] - 5 * p1[0] + 4 * p2[0] - p3[0]) * t2 +
-                      (-p0[0] + 3 * p1[0] - 3 * p2[0] + p3[0]) * t3)
+def load_json(data):
+    """Parse UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
-            y = 0.5 * ((2 * p1[1]) +
-                      (-p0[1] + p2[1]) * t_norm +
-                      (2 * p0[1] - 5 * p1[1] + 4 * p2[1] - p3[1]) * t2 +
-                      (-p0[1] + 3 * p1[1] - 3 * p2[1] + p3[1]) * t3)
 
-            smoothed.append((x, y))
+def pack_color(color):
+    """Pack an (r, g, b) float color into a 0xRRGGBB integer for cheap comparisons."""
+    r, g, b = color
+    return (round(r * 255) << 16) | (round(g * 255) << 8) | round(b * 255)
 
-    # Add last two points
-    smoothed.append(points[-2])
-    smoothed.append(points[-1])
 
-    return smoothed
+def stroke_path(points):
+    """
+    Build a reusable cairo path for an (n, 2) array of stroke points given in
+    world coordinates.
+    The path can be replayed with a single cr.append_path() call.
+    A single point becomes a zero-length segment, which cairo strokes as a dot
+    with round caps.
+    Returns the path and its (x1, y1, x2, y2) extents.
+    """
+    # Apply smoothing for longer strokes; the spline reads the array directly
+    if len(points) >= 4:
+        points = catmull_rom_spline(points, num_segments=STROKE_SPLINE_SEGMENTS)
+    else:
+        points = points.tolist()
+
+    cr = _path_context
+    cr.new_path()
+    cr.move_to(*points[0])
+    if len(points) == 1:
+        cr.line_to(*points[0])
+    for x, y in points[1:]:
+        cr.line_to(x, y)
+    path = cr.copy_path_flat()  # only line segments; the spline is already tessellated
+    extents = cr.path_extents()
+    cr.new_path()
+    return path, extents
+
+
+def rects_overlap(a, b):
+    """Check whether two (x1, y1, x2, y2) rectangles intersect."""
+    return a[2] >= b[0] and a[0] <= b[2] and a[3] >= b[1] and a[1] <= b[3]
+
+
+def shape_bounds(shape):
+    """Return the world-space (x1, y1, x2, y2) bounds of a shape, line width included."""
+    x, y, w, h = shape['x'], shape['y'], shape['w'], shape['h']
+    pad = shape['size'] / 2
+    if shape['type'] == 'arrow':
+        pad += ARROW_HEAD_LENGTH
+    return (min(x, x + w) - pad, min(y, y + h) - pad,
+            max(x, x + w) + pad, max(y, y + h) + pad)
+
+
+def stroke_bounds(stroke):
+    """Return the world-space (x1, y1, x2, y2) bounds of a stroke, line width included."""
+    xy = stroke['xy'][:stroke['n']]
+    (x1, y1), (x2, y2) = xy.min(axis=0).tolist(), xy.max(axis=0).tolist()
+    pad = stroke['size'] / 2
+    return x1 - pad, y1 - pad, x2 + pad, y2 + pad
+
+
+def arrow_head(dx, dy):
+    """
+    Return the offsets (lx, ly, rx, ry) from an arrow's tip to the ends of its
+    two head legs, for a shaft running by (dx, dy).
+    """
+    angle = atan2(dy, dx)
+    return (-ARROW_HEAD_LENGTH * cos(angle - ARROW_HEAD_ANGLE),
+            -ARROW_HEAD_LENGTH * sin(angle - ARROW_HEAD_ANGLE),
+            -ARROW_HEAD_LENGTH * cos(angle + ARROW_HEAD_ANGLE),
+            -ARROW_HEAD_LENGTH * sin(angle + ARROW_HEAD_ANGLE))
+
+
+def text_bounds(text_item):
+    """Return generous world-space bounds of a text item drawn from its baseline."""
+    x, y = text_item['x'], text_item['y']
+    font_size = text_item['font_size']
+    return (x, y - font_size, x + font_size * len(text_item['text']), y + font_size / 2)
+
+
+def _scale_image(pixbuf, width, height):
+    """Bilinearly scale a pixbuf, raising if GdkPixbuf can't allocate the copy."""
+    scaled = pixbuf.scale_simple(width, height, GdkPixbuf.InterpType.BILINEAR)
+    if scaled is None:
+        raise RuntimeError(f"out of memory allocating a {width}x{height} image")
+    return scaled
+
+
+def prepare_image(pixbuf, max_size=500):
+    """
+    Scale an image down to fit max_size and build its mip chain: halved
+    copies for drawing at low zoom, down to about 32 pixels. Returns the list
+    of levels, largest first. Safe to call from a worker thread.
+    """
+    width = pixbuf.get_width()
+    height = pixbuf.get_height()
+
+    # Scale large images down
+    if width > max_size or height > max_size:
+        scale = min(max_size / width, max_size / height)
+        # Very thin images would round their short side down to zero
+        width = max(1, int(width * scale))
+        height = max(1, int(height * scale))
+        pixbuf = _scale_image(pixbuf, width, height)
+
+    mips = [pixbuf]
+    while min(width, height) >= 64:
+        width = max(1, width // 2)
+        height = max(1, height // 2)
+        mips.append(_scale_image(mips[-1], width, height))
+    return mips
 
 
 class WhiteboardArea(Gtk.DrawingArea):
@@ -61,8 +332,8 @@ class WhiteboardArea(Gtk.DrawingArea):
             Gdk.EventMask.SCROLL_MASK |
             Gdk.EventMask.KEY_PRESS_MASK
         )
-        self.strokes = []           # list of strokes, each stroke is a dict with 'points', 'color', 'size', 'is_eraser'
-        self.current_stroke = None
+        self.reset_strokes()        # committed strokes, stored column-wise (see reset_strokes)
+        self.current_stroke = None  # dict with 'xy' ((N, 2) POINT_DTYPE buffer), 'n' (points used), 'color' (None for eraser), 'color_u32', 'size', 'is_eraser'
         self.brush_size = 3
         self.shapes = []            # list of shapes: {'type': 'rect'/'circle'/'triangle'/'arrow', 'x', 'y', 'w', 'h', 'color', 'size'}
         self.current_shape = None
@@ -77,29 +348,112 @@ class WhiteboardArea(Gtk.DrawingArea):
         self.is_panning = False
         self.pan_start_x = 0
         self.pan_start_y = 0
+        self._cursor_pan = None             # created once the widget is realized
+        self._cursor_default = None
 
         # zoom
         self.zoom = 1.0
         self.min_zoom = 0.1
         self.max_zoom = 5.0
 
+        # motion redraw throttling
+        self._last_draw_ns = 0
+        self._draw_scheduled = False
+        self._dirty_full = False
+        self._dirty_area = None     # pending damage as screen (x0, y0, x1, y1)
+
+        # Images and committed strokes pre-rendered at the current zoom
+        self._cache_surface = None
+        self._cache_origin = (0, 0)         # camera offset the cache was rendered at
+        self._cache_size = (0, 0)           # widget size the cache was rendered for
+
+        # Committed shapes and text, a second layer with the same layout drawn
+        # above the strokes
+        self._shapes_surface = None
+
+        # Finished strokes are baked into the cache on a worker thread; until that
+        # is done they are drawn live from _pending_strokes
+        self._cache_lock = threading.Lock()
+        self._cache_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._pending_strokes = []
+
         self.connect("draw", self.on_draw)
         self.connect("button-press-event", self.on_button_press)
         self.connect("motion-notify-event", self.on_motion)
         self.connect("button-release-event", self.on_button_release)
         self.connect("scroll-event", self.on_scroll)
+        self.connect("destroy", self.on_destroy)
+        self.connect("realize", self.on_realize)
 
         self.set_hexpand(True)
         self.set_vexpand(True)
         self.set_can_focus(True)
 
+    def on_realize(self, widget):
+        # Let GDK merge bursts of motion events into one. This is the default since
+        # GTK 3.8; setting it explicitly keeps older or patched stacks consistent.
+        self.get_window().set_event_compression(True)
+
+        display = self.get_display()
+        self._cursor_pan = Gdk.Cursor.new_for_display(display, Gdk.CursorType.FLEUR)
+        self._cursor_default = Gdk.Cursor.new_for_display(display, Gdk.CursorType.LEFT_PTR)
+
+    def on_destroy(self, widget):
+        self._cache_executor.shutdown(wait=False)
+
+    def reset_strokes(self):
+        """Drop all committed strokes. Entry i of every stroke_* column describes stroke i."""
+        self.stroke_count = 0
+        self.stroke_xy = []         # (N, 2) POINT_DTYPE point arrays
+        self.stroke_paths = []      # prebuilt cairo paths in world coordinates
+        self.stroke_colors = []     # (r, g, b), or None for eraser strokes
+        # Fixed-size columns grow by doubling; only the first stroke_count rows are used
+        self.stroke_bbox = np.empty((64, 4))                # x1, y1, x2, y2
+        self.stroke_size = np.empty(64)
+        self.stroke_color_u32 = np.empty(64, dtype=np.uint32)
+        self.stroke_is_eraser = np.empty(64, dtype=bool)
+
+    def add_stroke(self, stroke):
+        """
+        Freeze a finished stroke dict and append it to the stroke columns. The dict
+        is left with its trimmed buffer and prebuilt path so it can still be drawn.
+        """
+        n = stroke['n']
+        xy = stroke['xy'][:n].copy()
+        # Path extents also cover the spline swinging past the raw points
+        path, extents = stroke_path(xy)
+        if n == 1:
+            x, y = xy[0].tolist()
+            extents = (x, y, x, y)
+        stroke['xy'] = xy
+        stroke['_path'] = path
+        stroke.pop('_live', None)
+
+        i = self.stroke_count
+        if i == len(self.stroke_size):
+            self.stroke_bbox = np.resize(self.stroke_bbox, (i * 2, 4))
+            self.stroke_size = np.resize(self.stroke_size, i * 2)
+            self.stroke_color_u32 = np.resize(self.stroke_color_u32, i * 2)
+            self.stroke_is_eraser = np.resize(self.stroke_is_eraser, i * 2)
+
+        self.stroke_xy.append(xy)
+        self.stroke_paths.append(path)
+        self.stroke_colors.append(stroke['color'])
+        self.stroke_bbox[i] = extents
+        self.stroke_size[i] = stroke['size']
+        self.stroke_color_u32[i] = 0 if stroke['is_eraser'] else stroke['color_u32']
+        self.stroke_is_eraser[i] = stroke['is_eraser']
+        self.stroke_count = i + 1
+
     def clear(self):
-        self.strokes = []
+        self.reset_strokes()
+        self._pending_strokes = []
         self.current_stroke = None
         self.shapes = []
         self.current_shape = None
         self.text_items = []
         self.images = []
+        self.invalidate_cache()
         self.queue_draw()
 
     def screen_to_world(self, sx, sy):
@@ -110,6 +464,22 @@ class WhiteboardArea(Gtk.DrawingArea):
         """Convert world coordinates to screen coordinates."""
         return wx * self.zoom + self.offset_x, wy * self.zoom + self.offset_y
 
+    def screen_to_world_batch(self, pts):
+        """
+        Convert an (N, 2) array of screen coordinates to world coordinates in one
+        vectorized step. Single events should keep using screen_to_world.
+        """
+        offset = np.array((self.offset_x, self.offset_y), dtype=pts.dtype)
+        return (pts - offset) / self.zoom
+
+    def world_to_screen_batch(self, pts):
+        """
+        Convert an (N, 2) array of world coordinates to screen coordinates.
+        For bulk conversions; single points should use world_to_screen.
+        """
+        offset = np.array((self.offset_x, self.offset_y), dtype=pts.dtype)
+        return pts * self.zoom + offset
+
     def on_scroll(self, widget, event):
         """Handle mouse wheel scrolling for zoom."""
         # Get mouse position for zoom center
@@ -147,196 +517,442 @@ class WhiteboardArea(Gtk.DrawingArea):
             self.offset_x += mouse_x - new_screen_x
             self.offset_y += mouse_y - new_screen_y
 
+            self.invalidate_cache()
             self.queue_draw()
 
         return Gdk.EVENT_STOP
 
     def on_draw(self, widget, cr):
+        if not self.cache_is_valid():
+            self.rebuild_cache()
+
         # background
         cr.set_source_rgb(*self.app.bg_color)
         cr.paint()
 
+        # Images and committed strokes come from the transparent cache
+        with self._cache_lock:
+            self.paint_cache_layer(cr, self._cache_surface)
+
+        # Everything drawn live uses the same caps and joins as the cache
         cr.set_line_cap(1)  # CAIRO_LINE_CAP_ROUND
         cr.set_line_join(1)  # CAIRO_LINE_JOIN_ROUND
 
-        # Draw images
-        for img in self.images:
-            sx, sy = self.world_to_screen(img['x'], img['y'])
-            scaled_width = img['width'] * self.zoom
-            scaled_height = img['height'] * self.zoom
+        # Strokes not yet baked into the cache
+        if self._pending_strokes:
+            cr.save()
+            self.apply_camera(cr)
+            for stroke in self._pending_strokes:
+                self.draw_stroke(cr, stroke)
+            cr.restore()
 
-            # Scale pixbuf
-            scaled_pixbuf = img['pixbuf'].scale_simple(
-                int(scaled_width), int(scaled_height),
-                GdkPixbuf.InterpType.BILINEAR
-            )
+        # Committed shapes and text
+        if self._shapes_surface is None:
+            self.rebuild_shapes_cache()
+        self.paint_cache_layer(cr, self._shapes_surface)
 
-            Gdk.cairo_set_source_pixbuf(cr, scaled_pixbuf, sx, sy)
-            cr.paint()
+        # The shape and stroke in progress are drawn in world coordinates
+        # through the camera transform
+        self.apply_camera(cr)
 
-        # draw all the strokes
-        for stroke in self.strokes:
-            points = stroke['points']
-            color = stroke['color']
-            size = stroke['size']
+        # Draw current shape being created
+        if self.current_shape:
+            self.draw_shape(cr, self.current_shape)
 
-            cr.set_source_rgb(*color)
-            cr.set_line_width(size * self.zoom)
+        # The current stroke
+        if self.current_stroke:
+            self.draw_stroke(cr, self.current_stroke)
+
+    def world_clip_extents(self, cr):
+        """Return the clip region of a screen-space cr as world (x1, y1, x2, y2)."""
+        x1, y1, x2, y2 = cr.clip_extents()
+        return self.screen_to_world(x1, y1) + self.screen_to_world(x2, y2)
+
+    def paint_cache_layer(self, cr, surface):
+        """Paint a cache layer onto the screen-space cr at the current camera offset."""
+        cox, coy = self._cache_origin
+        cr.set_source_surface(surface,
+                              self.offset_x - cox - CACHE_MARGIN,
+                              self.offset_y - coy - CACHE_MARGIN)
+        cr.get_source().set_filter(cairo.FILTER_NEAREST)  # keep pixels crisp on fractional pans
+        cr.paint()
 
-            if len(points) < 2:
-                if points:
-                    sx, sy = self.world_to_screen(points[0][0], points[0][1])
-                    cr.arc(sx, sy, size * self.zoom / 2, 0, 2 * math.pi)
-                    cr.fill()
-                continue
+    def invalidate_cache(self):
+        """Drop the committed-content cache; it is rebuilt on the next draw."""
+        self._cache_surface = None
+
+    def cache_is_valid(self):
+        """Check whether the cache still covers the current view."""
+        if self._cache_surface is None:
+            return False
+        alloc = self.get_allocation()
+        cox, coy = self._cache_origin
+        return (self._cache_size == (alloc.width, alloc.height) and
+                abs(self.offset_x - cox) <= CACHE_MARGIN and
+                abs(self.offset_y - coy) <= CACHE_MARGIN)
+
+    def cache_context(self, target=None):
+        """
+        Create a context drawing into the cache in the current screen coordinates.
+        If target is given, the context draws onto it with the cache's layout instead.
+        """
+        cr = cairo.Context(target or self._cache_surface)
+        cox, coy = self._cache_origin
+        cr.translate(CACHE_MARGIN + cox - self.offset_x, CACHE_MARGIN + coy - self.offset_y)
+        cr.set_line_cap(1)  # CAIRO_LINE_CAP_ROUND
+        cr.set_line_join(1)  # CAIRO_LINE_JOIN_ROUND
+        return cr
+
+    def create_cache_surface(self):
+        """Create an empty surface for a cache layer covering the viewport and margin."""
+        alloc = self.get_allocation()
+        return self.get_window().create_similar_image_surface(
+            cairo.FORMAT_ARGB32,
+            alloc.width + 2 * CACHE_MARGIN,
+            alloc.height + 2 * CACHE_MARGIN,
+            0  # use the window's scale factor
+        )
 
-            # Apply smoothing for longer strokes
-            if len(points) >= 4:
-                smoothed_points = catmull_rom_spline(points, num_segments=5)
-            else:
-                smoothed_points = points
+    def rebuild_cache(self):
+        """Render the images and committed strokes around the viewport."""
+        alloc = self.get_allocation()
+        self._cache_surface = self.create_cache_surface()
+        self._cache_origin = (self.offset_x, self.offset_y)
+        self._cache_size = (alloc.width, alloc.height)
+        self.draw_committed(self.cache_context())
 
-            sx, sy = self.world_to_screen(smoothed_points[0][0], smoothed_points[0][1])
-            cr.move_to(sx, sy)
-            for x, y in smoothed_points[1:]:
-                sx, sy = self.world_to_screen(x, y)
-                cr.line_to(sx, sy)
-            cr.stroke()
+        # The shapes layer shares the cache's layout, so it goes stale too
+        self._shapes_surface = None
 
-        # Draw shapes
-        for shape in self.shapes:
-            self.draw_shape(cr, shape)
+    def rebuild_shapes_cache(self):
+        """Render the committed shapes and text with the current cache layout."""
+        self._shapes_surface = self.create_cache_surface()
+        cr = self.cache_context(self._shapes_surface)
 
-        # Draw current shape being created
-        if self.current_shape:
-            self.draw_shape(cr, self.current_shape)
+        # Only shapes and text that reach into the cached region are drawn
+        view = self.world_clip_extents(cr)
+        self.apply_camera(cr)
+
+        for shape in self.shapes:
+            if rects_overlap(shape_bounds(shape), view):
+                self.draw_shape(cr, shape)
 
-        # Draw text items
         for text_item in self.text_items:
-            self.draw_text_item(cr, text_item)
+            if rects_overlap(text_bounds(text_item), view):
+                self.draw_text_item(cr, text_item)
+
+    def add_to_shapes_cache(self, draw, item):
+        """Draw a newly committed shape or text item straight onto the shapes layer."""
+        if self._shapes_surface is None:
+            return
+        cr = self.cache_context(self._shapes_surface)
+        self.apply_camera(cr)
+        draw(cr, item)
+
+    def merge_into_cache(self, stroke):
+        """Bake a committed stroke into the cache without blocking the UI thread."""
+        # Recording the drawing commands is cheap; rasterizing them is done by the worker
+        recording = cairo.RecordingSurface(cairo.CONTENT_COLOR_ALPHA, None)
+        cr = self.cache_context(recording)
+        self.apply_camera(cr)
+        self.draw_stroke(cr, stroke)
+        del cr
+
+        self._pending_strokes.append(stroke)
+        self._cache_executor.submit(self._merge_recording, self._cache_surface, recording, stroke)
+
+    def _merge_recording(self, surface, recording, stroke):
+        # Runs on the worker thread. If the cache was rebuilt in the meantime this
+        # paints into the discarded surface, which is harmless: the rebuild
+        # already included the stroke.
+        with self._cache_lock:
+            cr = cairo.Context(surface)
+            if stroke['is_eraser']:
+                # The recorded eraser stroke is used as a mask that punches
+                # through to the background
+                cr.set_operator(cairo.OPERATOR_DEST_OUT)
+            cr.set_source_surface(recording, 0, 0)
+            cr.paint()
+        GLib.idle_add(self._merge_done, stroke)
+
+    def _merge_done(self, stroke):
+        # Back on the main loop. Repaint the stroke's area from the cache so the
+        # screen shows the baked pixels rather than the last live frame.
+        self._pending_strokes = [s for s in self._pending_strokes if s is not stroke]
+        if stroke['n']:
+            x1, y1, x2, y2 = stroke_bounds(stroke)
+            x0, y0 = self.world_to_screen(x1, y1)
+            x1, y1 = self.world_to_screen(x2, y2)
+            x0, y0 = math.floor(x0) - 2, math.floor(y0) - 2
+            self.queue_draw_area(x0, y0, math.ceil(x1) + 2 - x0, math.ceil(y1) + 2 - y0)
+        return False
 
-        # The current stroke
-        if self.current_stroke and len(self.current_stroke['points']) >= 2:
-            cr.set_source_rgb(*self.current_stroke['color'])
-            cr.set_line_width(self.current_stroke['size'] * self.zoom)
-            points = self.current_stroke['points']
-
-            # Apply smoothing
-            if len(points) >= 4:
-                smoothed_points = catmull_rom_spline(points, num_segments=5)
+    def draw_committed(self, cr):
+        """Draw the images and committed strokes onto a transparent target.
+
+        Eraser strokes clear what is under them, so the background painted
+        beneath the cache shows through whatever its color.
+        """
+        # Draw images
+        view = self.world_clip_extents(cr)
+        for img in self.images:
+            if not rects_overlap((img['x'], img['y'], img['x'] + img['width'], img['y'] + img['height']), view):
+                continue
+
+            sx, sy = self.world_to_screen(img['x'], img['y'])
+            key = (int(img['width'] * self.zoom), int(img['height'] * self.zoom))
+            if key[0] < 1 or key[1] < 1:
+                continue
+
+            # Resample only when the on-screen size changes; pans reuse the
+            # scaled copy, already converted to a cairo surface
+            cached = img.get('_scaled')
+            if cached is None or cached[0] != key:
+                # Start from the smallest mip level still at least the target
+                # size, so a bilinear step never shrinks by more than half
+                source = img['pixbuf']
+                for mip in img.get('_mips', ()):
+                    if mip.get_width() < key[0] or mip.get_height() < key[1]:
+                        break
+                    source = mip
+                scaled_pixbuf = source.scale_simple(key[0], key[1], GdkPixbuf.InterpType.BILINEAR)
+                cached = img['_scaled'] = (key, Gdk.cairo_surface_create_from_pixbuf(scaled_pixbuf, 1, None))
+
+            cr.set_source_surface(cached[1], sx, sy)
+            cr.paint()
+
+        # Strokes are drawn in world coordinates through the camera transform
+        cr.save()
+        self.apply_camera(cr)
+
+        # Visible world region, used to skip strokes outside the viewport
+        vx0, vy0, vx1, vy1 = cr.clip_extents()
+
+        # Cull against the viewport for all strokes at once, inflating each
+        # bbox by half the brush width
+        count = self.stroke_count
+        bbox = self.stroke_bbox[:count]
+        sizes = self.stroke_size[:count]
+        pad = sizes / 2
+        visible = np.flatnonzero((bbox[:, 2] + pad >= vx0) & (bbox[:, 0] - pad <= vx1) &
+                                 (bbox[:, 3] + pad >= vy0) & (bbox[:, 1] - pad <= vy1))
+
+        keys = np.where(self.stroke_is_eraser[:count], -1, self.stroke_color_u32[:count])
+        stroke_xy = self.stroke_xy
+        stroke_paths = self.stroke_paths
+        stroke_colors = self.stroke_colors
+        dot_size = SMALL_DOT_SIZE / self.zoom
+
+        dots = []   # small single-point strokes of the current run
+
+        # bound once, the loop below runs per visible stroke
+        set_operator = cr.set_operator
+        set_source_rgb = cr.set_source_rgb
+        set_line_width = cr.set_line_width
+        append_path = cr.append_path
+        append_dot = dots.append
+
+        # draw all the strokes; consecutive strokes of the same style are
+        # collected into one path and stroked together. Strokes are not
+        # regrouped by style across the whole board: overlapping strokes
+        # (erasers especially) must keep their drawing order
+        style = None
+        for i, color_key, size in zip(visible.tolist(), keys[visible].tolist(), sizes[visible].tolist()):
+            key = (color_key, size)
+            if key != style:
+                if style is not None:
+                    self.finish_stroke_run(cr, style[1], dots)
+                style = key
+                color = stroke_colors[i]
+                if color is None:
+                    set_operator(cairo.OPERATOR_CLEAR)
+                else:
+                    set_operator(cairo.OPERATOR_OVER)
+                    set_source_rgb(*color)
+                set_line_width(size)
+
+            if len(stroke_xy[i]) == 1 and size < dot_size:
+                append_dot(bbox[i, :2].tolist())
             else:
-                smoothed_points = points
-
-            sx, sy = self.world_to_screen(smoothed_points[0][0], smoothed_points[0][1])
-            cr.move_to(sx, sy)
-            for x, y in smoothed_points[1:]:
-                sx, sy = self.world_to_screen(x, y)
-                cr.line_to(sx, sy)
-            cr.stroke()
-        elif self.current_stroke and len(self.current_stroke['points']) == 1:
-            cr.set_source_rgb(*self.current_stroke['color'])
-            cr.set_line_width(self.current_stroke['size'] * self.zoom)
-            x, y = self.current_stroke['points'][0]
-            sx, sy = self.world_to_screen(x, y)
-            cr.arc(sx, sy, self.current_stroke['size'] * self.zoom / 2, 0, 2 * math.pi)
+                append_path(stroke_paths[i])
+
+        if style is not None:
+            self.finish_stroke_run(cr, style[1], dots)
+
+        cr.restore()
+
+    def finish_stroke_run(self, cr, size, dots):
+        """Stroke the collected run of strokes, then fill its small dots as squares."""
+        cr.stroke()
+        if dots:
+            half = size / 2
+            for x, y in dots:
+                cr.rectangle(x - half, y - half, size, size)
+            cr.fill()
+            dots.clear()
+
+    def apply_camera(self, cr):
+        """Set up cr so that world coordinates map to the screen (pan and zoom)."""
+        cr.translate(self.offset_x, self.offset_y)
+        cr.scale(self.zoom, self.zoom)
+
+    def draw_stroke(self, cr, stroke):
+        """Draw a stroke on the canvas. Expects cr to be in world coordinates."""
+        n = stroke['n']
+        if n == 0:
+            return
+
+        # Eraser strokes paint with whatever the background currently is
+        cr.set_source_rgb(*(self.app.bg_color if stroke['is_eraser'] else stroke['color']))
+        size = stroke['size']
+        cr.set_line_width(size)
+
+        if n == 1 and size * self.zoom < SMALL_DOT_SIZE:
+            x, y = stroke['xy'][0].tolist()
+            cr.rectangle(x - size / 2, y - size / 2, size, size)
             cr.fill()
+            return
+
+        # Committed strokes carry a prebuilt path; the live one is extended each frame
+        path = stroke.get('_path')
+        if path is None:
+            self.append_live_stroke_path(cr, stroke)
+        else:
+            cr.append_path(path)
+        cr.stroke()
+
+    def append_live_stroke_path(self, cr, stroke):
+        """
+        Append the smoothed path of the stroke being drawn to cr.
+
+        Spline segments whose control points are final are built once and
+        kept on a per-stroke scratch context in stroke['_live']. Only the last
+        segment is redone every frame, since on_motion may still replace the
+        last point.
+        """
+        n = stroke['n']
+        xy = stroke['xy']
+        if n < 4:
+            path, _ = stroke_path(xy[:n])
+            cr.append_path(path)
+            return
+
+        live = stroke.get('_live')
+        if live is None:
+            live = stroke['_live'] = [cairo.Context(cairo.RecordingSurface(cairo.CONTENT_ALPHA, None)), 0]
+            live[0].move_to(*xy[0].tolist())
+        live_cr, done = live
+
+        # Segment j uses points j..j+3, so segments before n - 4 are settled
+        settled = n - 4
+        if done < settled:
+            for x, y in catmull_rom_segments(xy[done:settled + 3], STROKE_SPLINE_SEGMENTS).tolist():
+                live_cr.line_to(x, y)
+            live[1] = settled
+
+        cr.append_path(live_cr.copy_path_flat())
+        for x, y in catmull_rom_segments(xy[settled:n], STROKE_SPLINE_SEGMENTS).tolist():
+            cr.line_to(x, y)
+        for x, y in xy[n - 2:n].tolist():
+            cr.line_to(x, y)
 
     def draw_shape(self, cr, shape):
-        """Draw a shape on the canvas."""
+        """Draw a shape on the canvas. Expects cr to be in world coordinates."""
         cr.set_source_rgb(*shape['color'])
-        cr.set_line_width(shape['size'] * self.zoom)
+        cr.set_line_width(shape['size'])
 
-        sx, sy = self.world_to_screen(shape['x'], shape['y'])
-        sw = shape['w'] * self.zoom
-        sh = shape['h'] * self.zoom
+        if shape is self.current_shape:
+            # Still changing with every motion event; nothing worth keeping
+            self.trace_shape(cr, shape)
+        else:
+            # Committed shapes keep their path; the rect corners depend on zoom
+            cached = shape.get('_path')
+            if cached is None or cached[0] != self.zoom:
+                path_cr = _path_context
+                path_cr.new_path()
+                self.trace_shape(path_cr, shape)
+                cached = shape['_path'] = (self.zoom, path_cr.copy_path())
+                path_cr.new_path()
+            cr.append_path(cached[1])
+        cr.stroke()
+
+    def trace_shape(self, cr, shape):
+        """Add the outline of a shape to the current path of cr, in world coordinates."""
+        x0, y0 = shape['x'], shape['y']
+        dx = shape['w']
+        dy = shape['h']
 
         shape_type = shape['type']
 
         if shape_type == 'rect':
             # Rounded rectangle
-            radius = min(abs(sw), abs(sh)) * 0.1
-            radius = min(radius, 20)
+            radius = min(abs(dx), abs(dy)) * 0.1
+            radius = min(radius, 20 / self.zoom)  # at most 20 screen pixels
 
             # Handle negative dimensions
-            x = sx if sw >= 0 else sx + sw
-            y = sy if sh >= 0 else sy + sh
-            w = abs(sw)
-            h = abs(sh)
+            x = x0 if dx >= 0 else x0 + dx
+            y = y0 if dy >= 0 else y0 + dy
+            w = abs(dx)
+            h = abs(dy)
 
             if w > 0 and h > 0:
-                # Draw rounded rectangle
                 cr.new_sub_path()
-                cr.arc(x + w - radius, y + radius, radius, -math.pi/2, 0)
-                cr.arc(x + w - radius, y + h - radius, radius, 0, math.pi/2)
-                cr.arc(x + radius, y + h - radius, radius, math.pi/2, math.pi)
-                cr.arc(x + radius, y + radius, radius, math.pi, 3*math.pi/2)
+                cr.arc(x + w - radius, y + radius, radius, -pi/2, 0)
+                cr.arc(x + w - radius, y + h - radius, radius, 0, pi/2)
+                cr.arc(x + radius, y + h - radius, radius, pi/2, pi)
+                cr.arc(x + radius, y + radius, radius, pi, 3*pi/2)
                 cr.close_path()
-                cr.stroke()
 
         elif shape_type == 'circle':
             # Calculate center and radius
-            cx = sx + sw / 2
-            cy = sy + sh / 2
-            radius = min(abs(sw), abs(sh)) / 2
+            cx = x0 + dx / 2
+            cy = y0 + dy / 2
+            radius = min(abs(dx), abs(dy)) / 2
 
-            cr.arc(cx, cy, radius, 0, 2 * math.pi)
-            cr.stroke()
+            cr.new_sub_path()
+            cr.arc(cx, cy, radius, 0, TAU)
 
         elif shape_type == 'triangle':
             # Handle negative dimensions
-            x = sx if sw >= 0 else sx + sw
-            y = sy if sh >= 0 else sy + sh
-            w = abs(sw)
-            h = abs(sh)
+            x = x0 if dx >= 0 else x0 + dx
+            y = y0 if dy >= 0 else y0 + dy
+            w = abs(dx)
+            h = abs(dy)
 
             # Equilateral-ish triangle pointing up
             cr.move_to(x + w / 2, y)
             cr.line_to(x + w, y + h)
             cr.line_to(x, y + h)
             cr.close_path()
-            cr.stroke()
 
         elif shape_type == 'arrow':
-            # Draw arrow from start to end point
-            x1, y1 = sx, sy
-            x2, y2 = sx + sw, sy + sh
+            # Arrow from start to end point
+            x1, y1 = x0, y0
+            x2, y2 = x0 + dx, y0 + dy
 
             # Arrow body
             cr.move_to(x1, y1)
             cr.line_to(x2, y2)
-            cr.stroke()
-
-            # Arrow head
-            arrow_length = 15 * self.zoom
-            arrow_angle = math.pi / 6  # 30 degrees
 
-            angle = math.atan2(y2 - y1, x2 - x1)
+            # Arrow head; committed arrows carry it precomputed
+            head = shape.get('_head')
+            if head is None:
+                head = arrow_head(dx, dy)
+            lx, ly, rx, ry = head
 
-            # Left part of arrow head
+            # Left and right parts of arrow head
             cr.move_to(x2, y2)
-            cr.line_to(
-                x2 - arrow_length * math.cos(angle - arrow_angle),
-                y2 - arrow_length * math.sin(angle - arrow_angle)
-            )
-            cr.stroke()
-
-            # Right part of arrow head
+            cr.line_to(x2 + lx, y2 + ly)
             cr.move_to(x2, y2)
-            cr.line_to(
-                x2 - arrow_length * math.cos(angle + arrow_angle),
-                y2 - arrow_length * math.sin(angle + arrow_angle)
-            )
-            cr.stroke()
+            cr.line_to(x2 + rx, y2 + ry)
 
     def draw_text_item(self, cr, text_item):
-        """Draw a text item on the canvas."""
-        sx, sy = self.world_to_screen(text_item['x'], text_item['y'])
-
+        """Draw a text item on the canvas. Expects cr to be in world coordinates."""
         cr.set_source_rgb(*text_item['color'])
         cr.select_font_face("Sans", 0, 0)  # CAIRO_FONT_SLANT_NORMAL, CAIRO_FONT_WEIGHT_NORMAL
-        cr.set_font_size(text_item['font_size'] * self.zoom)
+        cr.set_font_size(text_item['font_size'])
 
-        cr.move_to(sx, sy)
+        cr.move_to(text_item['x'], text_item['y'])
         cr.show_text(text_item['text'])
 
     def on_button_press(self, widget, event):
@@ -344,11 +960,12 @@ class WhiteboardArea(Gtk.DrawingArea):
             self.is_panning = True
             self.pan_start_x = event.x
             self.pan_start_y = event.y
-            self.get_window().set_cursor(Gdk.Cursor(Gdk.CursorType.FLEUR))
+            self.get_window().set_cursor(self._cursor_pan)
             return Gdk.EVENT_STOP
 
         elif event.button == 1 and not self.is_panning:
-            wx, wy = self.screen_to_world(event.x, event.y)
+            wx = (event.x - self.offset_x) / self.zoom
+            wy = (event.y - self.offset_y) / self.zoom
 
             # Check if text tool is active
             if self.app.current_tool == 'text':
@@ -371,18 +988,25 @@ class WhiteboardArea(Gtk.DrawingArea):
                 return Gdk.EVENT_STOP
 
             # Default: brush tool
-            # Determine color based on eraser mode
+            # Eraser strokes take the background color at draw time
             if self.app.eraser_mode:
-                color = self.app.bg_color
+                color = None
             else:
                 color = self.app.brush_color
+            xy = np.empty((64, 2), dtype=POINT_DTYPE)
+            xy[0] = wx, wy
             self.current_stroke = {
-                'points': [(wx, wy)],
+                'xy': xy,
+                'n': 1,
                 'color': color,
+                'color_u32': None if color is None else pack_color(color),
                 'size': self.brush_size,
                 'is_eraser': self.app.eraser_mode
             }
-            self.queue_draw()
+            # Only the new dot needs repainting
+            m = self.brush_size * self.zoom / 2 + 2
+            self.queue_draw_area(int(event.x - m), int(event.y - m),
+                                 math.ceil(2 * m) + 1, math.ceil(2 * m) + 1)
             return Gdk.EVENT_STOP
 
         return Gdk.EVENT_PROPAGATE
@@ -395,46 +1019,141 @@ class WhiteboardArea(Gtk.DrawingArea):
             self.offset_y += dy
             self.pan_start_x = event.x
             self.pan_start_y = event.y
-            self.queue_draw()
+            self.queue_motion_draw()
             return Gdk.EVENT_STOP
 
         elif event.state & Gdk.ModifierType.BUTTON1_MASK and not self.is_panning:
-            wx, wy = self.screen_to_world(event.x, event.y)
+            # screen_to_world, inlined for the per-event path
+            zoom = self.zoom
+            wx = (event.x - self.offset_x) / zoom
+            wy = (event.y - self.offset_y) / zoom
 
             # Shape drawing
             if self.current_shape is not None:
-                self.current_shape['w'] = wx - self.shape_start_x
-                self.current_shape['h'] = wy - self.shape_start_y
-                self.queue_draw()
+                # Repaint what the shape covered before and after the change
+                shape = self.current_shape
+                old = shape_bounds(shape)
+                shape['w'] = wx - self.shape_start_x
+                shape['h'] = wy - self.shape_start_y
+                new = shape_bounds(shape)
+                x0, y0 = self.world_to_screen(min(old[0], new[0]), min(old[1], new[1]))
+                x1, y1 = self.world_to_screen(max(old[2], new[2]), max(old[3], new[3]))
+                self.queue_motion_draw((x0 - 2, y0 - 2, x1 + 2, y1 + 2))
                 return Gdk.EVENT_STOP
 
             # Brush drawing
             if self.current_stroke is not None:
-                self.current_stroke['points'].append((wx, wy))
-                self.queue_draw()
+                stroke = self.current_stroke
+                n = stroke['n']
+                xy = stroke['xy']
+                z2 = zoom * zoom
+
+                # Drop samples that barely moved
+                lx, ly = xy[n - 1].tolist()
+                dx, dy = wx - lx, wy - ly
+                if (dx * dx + dy * dy) * z2 < MIN_POINT_DISTANCE * MIN_POINT_DISTANCE:
+                    return Gdk.EVENT_STOP
+
+                # If the last point sits on the line towards the new one, replace it
+                if n >= 2:
+                    px, py = xy[n - 2].tolist()
+                    ax, ay = lx - px, ly - py
+                    if abs(ax * dy - ay * dx) * z2 < COLLINEAR_TOLERANCE and ax * dx + ay * dy > 0:
+                        n -= 1
+
+                if n == len(stroke['xy']):
+                    # Out of room: double the buffer
+                    stroke['xy'] = np.resize(stroke['xy'], (n * 2, 2))
+                stroke['xy'][n] = wx, wy
+                stroke['n'] = n + 1
+
+                # A new point reshapes the spline over the last four points only
+                tail = stroke['xy'][max(0, n - 3):n + 1]
+                x0, y0 = tail.min(axis=0).tolist()
+                x1, y1 = tail.max(axis=0).tolist()
+                m = stroke['size'] * zoom + 2
+                sx0, sy0 = self.world_to_screen(x0, y0)
+                sx1, sy1 = self.world_to_screen(x1, y1)
+                self.queue_motion_draw((sx0 - m, sy0 - m, sx1 + m, sy1 + m))
             return Gdk.EVENT_STOP
 
         return Gdk.EVENT_PROPAGATE
 
+    def queue_motion_draw(self, area=None):
+        """
+        Request a redraw on behalf of a motion event. Pointer events can arrive far
+        faster than the screen refreshes, so redraws are coalesced to at most one
+        per MOTION_REDRAW_INTERVAL_NS; state is still updated on every event.
+        area is the screen rectangle (x0, y0, x1, y1) that changed, or None to
+        repaint the whole widget. Areas requested before the redraw are merged.
+        """
+        if area is None:
+            self._dirty_full = True
+        elif self._dirty_area is None:
+            self._dirty_area = area
+        else:
+            d = self._dirty_area
+            self._dirty_area = (min(d[0], area[0]), min(d[1], area[1]),
+                                max(d[2], area[2]), max(d[3], area[3]))
+
+        if self._draw_scheduled:
+            return
+        self._draw_scheduled = True
+        elapsed = time.monotonic_ns() - self._last_draw_ns
+        # Same priority as GTK's own redraws, so the damage is queued ahead of
+        # ordinary idle work and lands in the next frame
+        priority = GLib.PRIORITY_HIGH_IDLE + 20
+        if elapsed >= MOTION_REDRAW_INTERVAL_NS:
+            GLib.idle_add(self._do_queue_draw, priority=priority)
+        else:
+            # Too soon: redraw once the budget has passed so the last events still show
+            delay_ms = math.ceil((MOTION_REDRAW_INTERVAL_NS - elapsed) / 1_000_000)
+            GLib.timeout_add(delay_ms, self._do_queue_draw, priority=priority)
+
+    def _do_queue_draw(self):
+        self._draw_scheduled = False
+        self._last_draw_ns = time.monotonic_ns()
+        if self._dirty_full or self._dirty_area is None:
+            self.queue_draw()
+        else:
+            x0, y0, x1, y1 = self._dirty_area
+            x0, y0 = math.floor(x0), math.floor(y0)
+            self.queue_draw_area(x0, y0, math.ceil(x1) - x0, math.ceil(y1) - y0)
+        self._dirty_full = False
+        self._dirty_area = None
+        return False
+
     def on_button_release(self, widget, event):
         if event.button == 3:
             self.is_panning = False
-            self.get_window().set_cursor(Gdk.Cursor(Gdk.CursorType.LEFT_PTR))
+            self.get_window().set_cursor(self._cursor_default)
             return Gdk.EVENT_STOP
 
         elif event.button == 1:
             # Shape creation
             if self.current_shape is not None:
-                if abs(self.current_shape['w']) > 5 or abs(self.current_shape['h']) > 5:
-                    self.shapes.append(self.current_shape)
+                shape = self.current_shape
+                if abs(shape['w']) > 5 or abs(shape['h']) > 5:
+                    if shape['type'] == 'arrow':
+                        shape['_head'] = arrow_head(shape['w'], shape['h'])
+                    self.shapes.append(shape)
+                    self.add_to_shapes_cache(self.draw_shape, shape)
                 self.current_shape = None
                 self.queue_draw()
                 return Gdk.EVENT_STOP
 
             # Stroke creation
             if self.current_stroke is not None:
-                if len(self.current_stroke['points']) > 0:
-                    self.strokes.append(self.current_stroke)
+                stroke = self.current_stroke
+                if stroke['n'] > 0:
+                    # Drop points that don't change the stroke's shape on screen
+                    xy = simplify_polyline(stroke['xy'][:stroke['n']], SIMPLIFY_TOLERANCE / self.zoom)
+                    stroke['xy'] = xy
+                    stroke['n'] = len(xy)
+                    self.add_stroke(stroke)
+                    # Paint just the new stroke into the cache
+                    if self._cache_surface is not None:
+                        self.merge_into_cache(stroke)
                 self.current_stroke = None
                 self.queue_draw()
                 return Gdk.EVENT_STOP
@@ -444,42 +1163,44 @@ class WhiteboardArea(Gtk.DrawingArea):
     def add_text(self, text, x, y):
         """Add text at the specified world coordinates."""
         if text.strip():
-            self.text_items.append({
+            text_item = {
                 'text': text,
                 'x': x,
                 'y': y,
                 'color': self.app.brush_color,
                 'font_size': max(12, self.brush_size * 4)
-            })
+            }
+            self.text_items.append(text_item)
+            self.add_to_shapes_cache(self.draw_text_item, text_item)
             self.queue_draw()
 
-    def add_image(self, pixbuf, x, y):
-        """Add an image at the specified world coordinates."""
-        # Scale large images down
-        max_size = 500
-        width = pixbuf.get_width()
-        height = pixbuf.get_height()
-
-        if width > max_size or height > max_size:
-            scale = min(max_size / width, max_size / height)
-            width = int(width * scale)
-            height = int(height * scale)
-            pixbuf = pixbuf.scale_simple(width, height, GdkPixbuf.InterpType.BILINEAR)
+    def add_image(self, pixbuf, x, y, mips=None):
+        """
+        Add an image at the specified world coordinates. mips is the result of
+        prepare_image() for pixbuf when it was already computed elsewhere.
+        """
+        if mips is None:
+            mips = prepare_image(pixbuf)
+        pixbuf = mips[0]
 
         self.images.append({
             'pixbuf': pixbuf,
+            '_mips': mips,
             'x': x,
             'y': y,
-            'width': width,
-            'height': height
+            'width': pixbuf.get_width(),
+            'height': pixbuf.get_height()
         })
+        self.invalidate_cache()
         self.queue_draw()
 
     def get_board_data(self):
         """Serialize board data for saving."""
         data = {
             'strokes': [],
-            'shapes': self.shapes.copy(),
+            # Keys starting with an underscore are derived at runtime and not saved
+            'shapes': [{k: v for k, v in shape.items() if not k.startswith('_')}
+                       for shape in self.shapes],
             'text_items': self.text_items.copy(),
             'offset_x': self.offset_x,
             'offset_y': self.offset_y,
@@ -487,30 +1208,125 @@ class WhiteboardArea(Gtk.DrawingArea):
             'brush_size': self.brush_size
         }
         # Serialize strokes (excluding pixbuf data from images)
-        for stroke in self.strokes:
+        count = self.stroke_count
+        sizes = self.stroke_size[:count].tolist()
+        erasers = self.stroke_is_eraser[:count].tolist()
+        for i in range(count):
             data['strokes'].append({
-                'points': stroke['points'],
-                'color': stroke['color'],
-                'size': stroke['size'],
-                'is_eraser': stroke.get('is_eraser', False)
+                'points': self.stroke_xy[i],  # written as a list by dump_json
+                # Erasers are saved with a concrete color so the file is self-describing
+                'color': self.app.bg_color if erasers[i] else self.stroke_colors[i],
+                'size': sizes[i],
+                'is_eraser': erasers[i]
             })
         return data
 
     def load_board_data(self, data):
         """Load board data from saved state."""
-        self.strokes = data.get('strokes', [])
+        self.reset_strokes()
+        for stroke in data.get('strokes', []):
+            xy = np.array(stroke.get('points', []), dtype=POINT_DTYPE).reshape(-1, 2)
+            if len(xy) == 0:
+                continue
+            is_eraser = stroke.get('is_eraser', False)
+            color = None if is_eraser else tuple(stroke['color'])
+            stroke = {
+                'xy': xy,
+                'n': len(xy),
+                'color': color,
+                'color_u32': None if color is None else pack_color(color),
+                'size': stroke['size'],
+                'is_eraser': is_eraser
+            }
+            self.add_stroke(stroke)
         self.shapes = data.get('shapes', [])
+        for shape in self.shapes:
+            if shape['type'] == 'arrow':
+                shape['_head'] = arrow_head(shape['w'], shape['h'])
         self.text_items = data.get('text_items', [])
         self.offset_x = data.get('offset_x', 0)
         self.offset_y = data.get('offset_y', 0)
         self.zoom = data.get('zoom', 1.0)
         self.brush_size = data.get('brush_size', 3)
         self.images = []  # Images are not saved/loaded
+        self.invalidate_cache()
         self.queue_draw()
 
 
+# Parsed CSS providers, keyed by their stylesheet
+_css_providers = {}
+
+
+def _get_css_provider(css):
+    """Return the Gtk.CssProvider for a stylesheet, parsing it on first use."""
+    provider = _css_providers.get(css)
+    if provider is None:
+        provider = _css_providers[css] = Gtk.CssProvider()
+        provider.load_from_data(css)
+    return provider
+
+
+# Default screen the stylesheets are installed on, looked up on first use
+_DEFAULT_SCREEN = None
+
+
+def _get_default_screen():
+    """Return the default Gdk.Screen, querying GDK only the first time."""
+    global _DEFAULT_SCREEN
+    if _DEFAULT_SCREEN is None:
+        _DEFAULT_SCREEN = Gdk.Screen.get_default()
+    return _DEFAULT_SCREEN
+
+
+MAIN_MENU_CSS = b"""
+window {
+    background-color: #f5f5f5;
+}
+.board-tile {
+    background-color: white;
+    border-radius: 12px;
+    padding: 20px;
+    box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1);
+    min-width: 150px;
+    min-height: 150px;
+}
+.board-tile:hover {
+    background-color: #fafafa;
+    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15);
+}
+.new-board-tile {
+    background-color: #e8f5e9;
+    border: 2px dashed #4caf50;
+}
+.new-board-tile:hover {
+    background-color: #c8e6c9;
+}
+.board-tile-label {
+    font-size: 14px;
+    font-weight: bold;
+    color: #333;
+}
+.delete-button {
+    background-color: #ffebee;
+    border-radius: 50%;
+    min-width: 24px;
+    min-height: 24px;
+    padding: 0;
+}
+.delete-button:hover {
+    background-color: #ffcdd2;
+}
+"""
+
+
 class MainMenuWindow(Gtk.Window):
     """Main menu window for board management."""
+
+    _css_installed = False
+
+    # Rendered theme previews, keyed by (is_light, scale factor)
+    _theme_previews = {}
+
     def __init__(self, app):
         super().__init__(title="Aboard - Whiteboard")
         self.app = app
@@ -582,52 +1398,16 @@ class MainMenuWindow(Gtk.Window):
 
     def apply_css(self):
         """Apply CSS styling for the main menu."""
-        css_provider = Gtk.CssProvider()
-        css = b"""
-        window {
-            background-color: #f5f5f5;
-        }
-        .board-tile {
-            background-color: white;
-            border-radius: 12px;
-            padding: 20px;
-            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1);
-            min-width: 150px;
-            min-height: 150px;
-        }
-        .board-tile:hover {
-            background-color: #fafafa;
-            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15);
-        }
-        .new-board-tile {
-            background-color: #e8f5e9;
-            border: 2px dashed #4caf50;
-        }
-        .new-board-tile:hover {
-            background-color: #c8e6c9;
-        }
-        .board-tile-label {
-            font-size: 14px;
-            font-weight: bold;
-            color: #333;
-        }
-        .delete-button {
-            background-color: #ffebee;
-            border-radius: 50%;
-            min-width: 24px;
-            min-height: 24px;
-            padding: 0;
-        }
-        .delete-button:hover {
-            background-color: #ffcdd2;
-        }
-        """
-        css_provider.load_from_data(css)
+        # The provider is installed on the screen once per process; later
+        # windows pick it up from there
+        if MainMenuWindow._css_installed:
+            return
         Gtk.StyleContext.add_provider_for_screen(
-            Gdk.Screen.get_default(),
-            css_provider,
+            _get_default_screen(),
+            _get_css_provider(MAIN_MENU_CSS),
             Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
         )
+        MainMenuWindow._css_installed = True
 
     def refresh_boards(self):
         """Refresh the list of saved boards."""
@@ -639,13 +1419,19 @@ class MainMenuWindow(Gtk.Window):
         new_tile = self.create_new_board_tile()
         self.flowbox.add(new_tile)
 
-        # Load saved boards
-        if os.path.exists(self.save_dir):
-            for filename in sorted(os.listdir(self.save_dir)):
-                if filename.endswith('.json'):
-                    board_name = filename[:-5]  # Remove .json extension
-                    tile = self.create_board_tile(board_name)
-                    self.flowbox.add(tile)
+        # Load saved boards; scandir entries know whether they are files
+        # without an extra stat
+        try:
+            with os.scandir(self.save_dir) as entries:
+                board_names = sorted(entry.name[:-5]  # Remove .json extension
+                                     for entry in entries
+                                     if entry.name.endswith('.json') and entry.is_file())
+        except FileNotFoundError:
+            board_names = []
+
+        for board_name in board_names:
+            tile = self.create_board_tile(board_name)
+            self.flowbox.add(tile)
 
         self.flowbox.show_all()
 
@@ -754,7 +1540,7 @@ class MainMenuWindow(Gtk.Window):
         light_btn = Gtk.RadioButton.new_with_label(None, "Light (Default)")
         light_preview = Gtk.DrawingArea()
         light_preview.set_size_request(60, 40)
-        light_preview.connect("draw", lambda w, cr: self.draw_theme_preview(cr, True))
+        light_preview.connect("draw", lambda w, cr: self.draw_theme_preview(w, cr, True))
 
         light_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         light_box.pack_start(light_preview, False, False, 0)
@@ -765,7 +1551,7 @@ class MainMenuWindow(Gtk.Window):
         dark_btn = Gtk.RadioButton.new_with_label_from_widget(light_btn, "Dark")
         dark_preview = Gtk.DrawingArea()
         dark_preview.set_size_request(60, 40)
-        dark_preview.connect("draw", lambda w, cr: self.draw_theme_preview(cr, False))
+        dark_preview.connect("draw", lambda w, cr: self.draw_theme_preview(w, cr, False))
 
         dark_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         dark_box.pack_start(dark_preview, False, False, 0)
@@ -785,8 +1571,23 @@ class MainMenuWindow(Gtk.Window):
         else:
             dialog.destroy()
 
-    def draw_theme_preview(self, cr, is_light):
-        """Draw a theme preview."""
+    def draw_theme_preview(self, widget, cr, is_light):
+        """Draw a theme preview, rendering it once and reusing the image afterwards."""
+        key = (is_light, widget.get_scale_factor())
+        surface = self._theme_previews.get(key)
+        if surface is None:
+            surface = widget.get_window().create_similar_image_surface(cairo.FORMAT_RGB24, 60, 40, 0)
+            self.render_theme_preview(cairo.Context(surface), is_light)
+            self._theme_previews[key] = surface
+
+        # The preview's edges are plain background, so padding fills any
+        # extra space the widget was given
+        cr.set_source_surface(surface, 0, 0)
+        cr.get_source().set_extend(cairo.EXTEND_PAD)
+        cr.paint()
+
+    def render_theme_preview(self, cr, is_light):
+        """Render a 60x40 theme preview."""
         if is_light:
             cr.set_source_rgb(1, 1, 1)
         else:
@@ -837,8 +1638,141 @@ class MainMenuWindow(Gtk.Window):
         Gtk.main_quit()
 
 
+WHITEBOARD_CSS = b"""
+.floating-sidebar {
+    background-color: rgba(30, 30, 30, 0.85);
+    border-radius: 12px;
+    padding: 8px;
+    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3);
+}
+.floating-sidebar button {
+    background-color: rgba(50, 50, 50, 0.9);
+    border-radius: 8px;
+    border: none;
+    min-width: 44px;
+    min-height: 44px;
+    margin: 4px;
+    color: white;
+}
+.floating-sidebar button:hover {
+    background-color: rgba(80, 80, 80, 0.95);
+}
+.floating-sidebar button:active,
+.floating-sidebar button.active {
+    background-color: rgba(80, 140, 200, 0.9);
+}
+.floating-sidebar .size-label {
+    color: white;
+    font-size: 11px;
+}
+.menu-button {
+    background-color: rgba(30, 30, 30, 0.85);
+    border-radius: 8px;
+    border: none;
+    min-width: 40px;
+    min-height: 40px;
+    box-shadow: 0 2px 8px rgba(0, 0, 0, 0.3);
+}
+.menu-button:hover {
+    background-color: rgba(50, 50, 50, 0.9);
+}
+.color-button {
+    border-radius: 50%;
+    min-width: 32px;
+    min-height: 32px;
+    padding: 0;
+    border: 2px solid rgba(255, 255, 255, 0.3);
+}
+.color-button:hover {
+    border: 2px solid rgba(255, 255, 255, 0.6);
+}
+.shape-menu {
+    background-color: rgba(40, 40, 40, 0.95);
+    border-radius: 8px;
+    padding: 8px;
+    margin: 8px;
+}
+.shape-menu button {
+    background-color: rgba(60, 60, 60, 0.9);
+    border-radius: 6px;
+    border: none;
+    min-width: 36px;
+    min-height: 36px;
+    margin: 2px;
+}
+.shape-menu button:hover {
+    background-color: rgba(90, 90, 90, 0.95);
+}
+.shape-menu button.active {
+    background-color: rgba(80, 140, 200, 0.9);
+}
+.size-popover {
+    background-color: rgba(40, 40, 40, 0.95);
+    border-radius: 8px;
+}
+.size-popover > box {
+    margin: 10px;
+}
+.size-popover label {
+    color: white;
+}
+"""
+
+
+@functools.lru_cache(maxsize=64)
+def load_white_icon(icon_path, size):
+    """
+    Load an icon file at size x size and make it white, or return None if it
+    can't be loaded. Results are shared, so callers must not modify them.
+    """
+    try:
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(icon_path, size, size)
+    except GLib.Error:
+        # A missing or unreadable file fails here, no need to stat it first
+        return None
+
+    # Make icon white by modifying a copy of the pixel data
+    pixels = pixbuf.get_pixels()
+    n_channels = pixbuf.get_n_channels()
+    rowstride = pixbuf.get_rowstride()
+    width = pixbuf.get_width()
+    height = pixbuf.get_height()
+
+    # Create new pixel data with white color. The last row may be
+    # shorter than rowstride; pad it so the buffer is a full grid
+    new_pixels = bytearray(pixels)
+    new_pixels.extend(bytes(height * rowstride - len(new_pixels)))
+    rows = np.frombuffer(new_pixels, dtype=np.uint8).reshape(height, rowstride)
+    image = rows[:, :width * n_channels].reshape(height, width, n_channels)
+    # Keep alpha, set RGB to white
+    if n_channels >= 3:
+        image[..., :3] = 255
+
+    # Create new pixbuf from modified data
+    return GdkPixbuf.Pixbuf.new_from_data(
+        bytes(new_pixels),
+        pixbuf.get_colorspace(),
+        pixbuf.get_has_alpha(),
+        pixbuf.get_bits_per_sample(),
+        width,
+        height,
+        rowstride
+    )
+
+
+# Burger menu entries, bound to each WhiteboardWindow's "win" actions
+BURGER_MENU = Gio.Menu()
+BURGER_MENU.append("Save", "win.save")
+BURGER_MENU.append("Toggle Sidebar", "win.toggle-sidebar")
+BURGER_MENU.append("Back to Menu", "win.back")
+BURGER_MENU.append("About", "win.about")
+
+
 class WhiteboardWindow(Gtk.Window):
     """Whiteboard editor window."""
+
+    _css_installed = False
+
     def __init__(self, app, main_menu, board_name, dark_mode=False, is_new=True):
         super().__init__(title=f"Aboard - {board_name}")
         self.app = app
@@ -860,6 +1794,9 @@ class WhiteboardWindow(Gtk.Window):
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
         self.save_dir = os.path.join(self.script_dir, "board_save")
 
+        # Read a saved board now, so its theme is in place for the first paint
+        board_data = None if is_new else self.read_board()
+
         # Apply CSS for floating sidebar style
         self.apply_css()
 
@@ -870,10 +1807,6 @@ class WhiteboardWindow(Gtk.Window):
         self.app.board = WhiteboardArea(self.app)
         overlay.add(self.app.board)
 
-        # Load existing board data if not new
-        if not is_new:
-            self.load_board()
-
         # Enable drag and drop for images
         self.app.board.drag_dest_set(
             Gtk.DestDefaults.ALL,
@@ -891,93 +1824,28 @@ class WhiteboardWindow(Gtk.Window):
         # Connect key press for paste (Ctrl+V)
         self.connect("key-press-event", self.on_key_press)
         self.connect("delete-event", self.on_close)
+        self.connect("focus-in-event", self.on_focus_in)
+        self.connect("destroy", self.on_destroy)
+        self.app.active_window = self
 
         self.show_all()
 
+        # Rebuild the saved content once the window has been painted
+        if board_data is not None:
+            GLib.idle_add(self.load_board, board_data)
+
     def apply_css(self):
         """Apply CSS styling."""
-        css_provider = Gtk.CssProvider()
-        css = b"""
-        .floating-sidebar {
-            background-color: rgba(30, 30, 30, 0.85);
-            border-radius: 12px;
-            padding: 8px;
-            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3);
-        }
-        .floating-sidebar button {
-            background-color: rgba(50, 50, 50, 0.9);
-            border-radius: 8px;
-            border: none;
-            min-width: 44px;
-            min-height: 44px;
-            margin: 4px;
-            color: white;
-        }
-        .floating-sidebar button:hover {
-            background-color: rgba(80, 80, 80, 0.95);
-        }
-        .floating-sidebar button:active,
-        .floating-sidebar button.active {
-            background-color: rgba(80, 140, 200, 0.9);
-        }
-        .floating-sidebar .size-label {
-            color: white;
-            font-size: 11px;
-        }
-        .menu-button {
-            background-color: rgba(30, 30, 30, 0.85);
-            border-radius: 8px;
-            border: none;
-            min-width: 40px;
-            min-height: 40px;
-            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.3);
-        }
-        .menu-button:hover {
-            background-color: rgba(50, 50, 50, 0.9);
-        }
-        .color-button {
-            border-radius: 50%;
-            min-width: 32px;
-            min-height: 32px;
-            padding: 0;
-            border: 2px solid rgba(255, 255, 255, 0.3);
-        }
-        .color-button:hover {
-            border: 2px solid rgba(255, 255, 255, 0.6);
-        }
-        .shape-menu {
-            background-color: rgba(40, 40, 40, 0.95);
-            border-radius: 8px;
-            padding: 8px;
-        }
-        .shape-menu button {
-            background-color: rgba(60, 60, 60, 0.9);
-            border-radius: 6px;
-            border: none;
-            min-width: 36px;
-            min-height: 36px;
-            margin: 2px;
-        }
-        .shape-menu button:hover {
-            background-color: rgba(90, 90, 90, 0.95);
-        }
-        .shape-menu button.active {
-            background-color: rgba(80, 140, 200, 0.9);
-        }
-        .size-popover {
-            background-color: rgba(40, 40, 40, 0.95);
-            border-radius: 8px;
-        }
-        .size-popover label {
-            color: white;
-        }
-        """
-        css_provider.load_from_data(css)
+        # The provider is installed on the screen once per process; later
+        # windows pick it up from there
+        if WhiteboardWindow._css_installed:
+            return
         Gtk.StyleContext.add_provider_for_screen(
-            Gdk.Screen.get_default(),
-            css_provider,
+            _get_default_screen(),
+            _get_css_provider(WHITEBOARD_CSS),
             Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
         )
+        WhiteboardWindow._css_installed = True
 
     def create_sidebar(self, overlay):
         """Create the floating sidebar."""
@@ -994,6 +1862,7 @@ class WhiteboardWindow(Gtk.Window):
         # Brush/Draw button with right-click for size
         self.brush_btn = self.create_icon_button("brush-symbolic.svg", "Brush (Right-click for size)")
         self.brush_btn.get_style_context().add_class("active")
+        self._active_tool_btn = self.brush_btn
         self.brush_btn.connect("clicked", self.on_select_brush)
         self.brush_btn.connect("button-press-event", self.on_brush_button_press)
         self.sidebar.pack_start(self.brush_btn, False, False, 0)
@@ -1004,13 +1873,13 @@ class WhiteboardWindow(Gtk.Window):
         self.eraser_btn.connect("button-press-event", self.on_eraser_button_press)
         self.sidebar.pack_start(self.eraser_btn, False, False, 0)
 
-        # Create brush size popover (shared between brush and eraser)
-        self.create_size_popover()
+        # Brush size popover (shared between brush and eraser), built on first use
+        self.size_popover = None
 
-        # Shapes button with popup menu
+        # Shapes button with popup menu, built on first use
         self.shapes_btn = self.create_icon_button("shapes-large-symbolic.svg", "Shapes")
-        self.create_shapes_popover()
-        self.shapes_btn.connect("clicked", lambda b: (self.on_select_shape(b), self.shapes_popover.popup()))
+        self.shapes_popover = None
+        self.shapes_btn.connect("clicked", self.on_shapes_button_clicked)
         self.sidebar.pack_start(self.shapes_btn, False, False, 0)
 
         # Text tool button
@@ -1021,10 +1890,7 @@ class WhiteboardWindow(Gtk.Window):
         # Color picker button
         self.color_btn = Gtk.ColorButton()
         self.color_btn.set_tooltip_text("Color")
-        if self.app.dark_mode:
-            self.color_btn.set_rgba(Gdk.RGBA(1, 1, 1, 1))
-        else:
-            self.color_btn.set_rgba(Gdk.RGBA(0, 0, 0, 1))
+        self.color_btn.set_rgba(Gdk.RGBA(*self.app.brush_color, 1))
         self.color_btn.connect("color-set", self.on_color_set)
         self.color_btn.get_style_context().add_class("color-button")
         self.sidebar.pack_start(self.color_btn, False, False, 0)
@@ -1043,18 +1909,18 @@ class WhiteboardWindow(Gtk.Window):
         self.size_popover.get_style_context().add_class("size-popover")
 
         size_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
-        size_box.set_margin_top(10)
-        size_box.set_margin_bottom(10)
-        size_box.set_margin_start(10)
-        size_box.set_margin_end(10)
 
-        self.size_label = Gtk.Label(label="Brush Size: 3")
+        # Built lazily, so start from the board's current size
+        size = self.app.board.brush_size
+        self.size_label = Gtk.Label(label=f"Brush Size: {size}")
         size_box.pack_start(self.size_label, False, False, 0)
 
         self.size_scale = Gtk.Scale.new_with_range(Gtk.Orientation.HORIZONTAL, 1, 50, 1)
-        self.size_scale.set_value(3)
+        self.size_scale.set_value(size)
         self.size_scale.set_size_request(150, -1)
         self.size_scale.connect("value-changed", self.on_brush_size_changed)
+        self._size_pending = size
+        self._size_timer = 0    # pending apply_brush_size source, or 0
         size_box.pack_start(self.size_scale, False, False, 0)
 
         self.size_popover.add(size_box)
@@ -1067,10 +1933,6 @@ class WhiteboardWindow(Gtk.Window):
 
         shapes_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=4)
         shapes_box.get_style_context().add_class("shape-menu")
-        shapes_box.set_margin_top(8)
-        shapes_box.set_margin_bottom(8)
-        shapes_box.set_margin_start(8)
-        shapes_box.set_margin_end(8)
 
         # Shape type buttons with icons
         self.shape_buttons = {}
@@ -1100,7 +1962,8 @@ class WhiteboardWindow(Gtk.Window):
             shapes_box.pack_start(btn, False, False, 0)
             self.shape_buttons[shape_type] = btn
 
-        self.shape_buttons['rect'].get_style_context().add_class("active")
+        self._active_shape_btn = self.shape_buttons[self.app.current_shape_type]
+        self._active_shape_btn.get_style_context().add_class("active")
 
         self.shapes_popover.add(shapes_box)
         shapes_box.show_all()
@@ -1120,31 +1983,17 @@ class WhiteboardWindow(Gtk.Window):
             menu_image = Gtk.Image.new_from_pixbuf(menu_pixbuf)
             menu_btn.set_image(menu_image)
 
-        # Menu popup
-        menu = Gtk.Menu()
-
-        # Save board
-        save_item = Gtk.MenuItem(label="Save")
-        save_item.connect("activate", self.on_save_board)
-        menu.append(save_item)
-
-        # Toggle sidebar
-        toggle_sidebar_item = Gtk.MenuItem(label="Toggle Sidebar")
-        toggle_sidebar_item.connect("activate", self.on_toggle_sidebar)
-        menu.append(toggle_sidebar_item)
-
-        # Back to main menu
-        back_item = Gtk.MenuItem(label="Back to Menu")
-        back_item.connect("activate", self.on_back_to_menu)
-        menu.append(back_item)
-
-        # About
-        about_item = Gtk.MenuItem(label="About")
-        about_item.connect("activate", self.on_about)
-        menu.append(about_item)
-
-        menu.show_all()
-        menu_btn.set_popup(menu)
+        # Menu popup; the model is shared, each window provides the actions
+        actions = Gio.SimpleActionGroup()
+        for name, handler in (("save", self.on_save_board),
+                              ("toggle-sidebar", self.on_toggle_sidebar),
+                              ("back", self.on_back_to_menu),
+                              ("about", self.on_about)):
+            action = Gio.SimpleAction.new(name, None)
+            action.connect("activate", lambda action, param, handler=handler: handler(action))
+            actions.add_action(action)
+        self.insert_action_group("win", actions)
+        menu_btn.set_menu_model(BURGER_MENU)
 
         overlay.add_overlay(menu_btn)
 
@@ -1154,43 +2003,7 @@ class WhiteboardWindow(Gtk.Window):
 
     def load_icon_white(self, icon_name, size=24):
         """Load an icon and make it white."""
-        icon_path = self.get_icon_path(icon_name)
-        if os.path.exists(icon_path):
-            try:
-                pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(icon_path, size, size)
-                # Make icon white by modifying pixel data
-                pixbuf = pixbuf.copy()  # Make a mutable copy
-                pixels = pixbuf.get_pixels()
-                n_channels = pixbuf.get_n_channels()
-                rowstride = pixbuf.get_rowstride()
-                width = pixbuf.get_width()
-                height = pixbuf.get_height()
-
-                # Create new pixel data with white color
-                new_pixels = bytearray(pixels)
-                for y in range(height):
-                    for x in range(width):
-                        idx = y * rowstride + x * n_channels
-                        # Keep alpha, set RGB to white
-                        if n_channels >= 3:
-                            new_pixels[idx] = 255      # R
-                            new_pixels[idx + 1] = 255  # G
-                            new_pixels[idx + 2] = 255  # B
-
-                # Create new pixbuf from modified data
-                new_pixbuf = GdkPixbuf.Pixbuf.new_from_data(
-                    bytes(new_pixels),
-                    pixbuf.get_colorspace(),
-                    pixbuf.get_has_alpha(),
-                    pixbuf.get_bits_per_sample(),
-                    width,
-                    height,
-                    rowstride
-                )
-                return new_pixbuf
-            except Exception:
-                pass
-        return None
+        return load_white_icon(self.get_icon_path(icon_name), size)
 
     def create_icon_button(self, icon_name, tooltip):
         """Create a button with an icon from the img folder."""
@@ -1208,19 +2021,31 @@ class WhiteboardWindow(Gtk.Window):
         button.set_relief(Gtk.ReliefStyle.NONE)
         return button
 
+    def show_size_popover(self, button):
+        """Pop up the brush size popover next to button, building it on first use."""
+        if self.size_popover is None:
+            self.create_size_popover()
+        self.size_popover.set_relative_to(button)
+        self.size_popover.popup()
+
+    def on_shapes_button_clicked(self, button):
+        """Select the shape tool and pop up the shape types, building them on first use."""
+        self.on_select_shape(button)
+        if self.shapes_popover is None:
+            self.create_shapes_popover()
+        self.shapes_popover.popup()
+
     def on_brush_button_press(self, button, event):
         """Handle brush button press - right click shows size popover."""
         if event.button == 3:  # Right click
-            self.size_popover.set_relative_to(button)
-            self.size_popover.popup()
+            self.show_size_popover(button)
             return True
         return False
 
     def on_eraser_button_press(self, button, event):
         """Handle eraser button press - right click shows size popover."""
         if event.button == 3:  # Right click
-            self.size_popover.set_relative_to(button)
-            self.size_popover.popup()
+            self.show_size_popover(button)
             return True
         return False
 
@@ -1249,12 +2074,11 @@ class WhiteboardWindow(Gtk.Window):
         self.app.current_tool = 'shape'
         self.app.eraser_mode = False
 
-        # Update shape button states
-        for st, btn in self.shape_buttons.items():
-            if st == shape_type:
-                btn.get_style_context().add_class("active")
-            else:
-                btn.get_style_context().remove_class("active")
+        # Move the highlight; only the two affected buttons are restyled
+        if self._active_shape_btn is not button:
+            self._active_shape_btn.get_style_context().remove_class("active")
+            button.get_style_context().add_class("active")
+            self._active_shape_btn = button
 
         self.update_tool_buttons()
         self.shapes_popover.popdown()
@@ -1267,21 +2091,22 @@ class WhiteboardWindow(Gtk.Window):
 
     def update_tool_buttons(self):
         """Update the visual state of tool buttons."""
-        # Reset all buttons
-        self.brush_btn.get_style_context().remove_class("active")
-        self.eraser_btn.get_style_context().remove_class("active")
-        self.shapes_btn.get_style_context().remove_class("active")
-        self.text_btn.get_style_context().remove_class("active")
-
-        # Set active button
         if self.app.eraser_mode:
-            self.eraser_btn.get_style_context().add_class("active")
-        elif self.app.current_tool == 'brush':
-            self.brush_btn.get_style_context().add_class("active")
-        elif self.app.current_tool == 'shape':
-            self.shapes_btn.get_style_context().add_class("active")
-        elif self.app.current_tool == 'text':
-            self.text_btn.get_style_context().add_class("active")
+            target = self.eraser_btn
+        else:
+            target = {
+                'brush': self.brush_btn,
+                'shape': self.shapes_btn,
+                'text': self.text_btn,
+            }.get(self.app.current_tool)
+
+        # Only the previously and newly active buttons are restyled
+        if target is not self._active_tool_btn:
+            if self._active_tool_btn is not None:
+                self._active_tool_btn.get_style_context().remove_class("active")
+            if target is not None:
+                target.get_style_context().add_class("active")
+            self._active_tool_btn = target
 
     def on_color_set(self, color_button):
         """Handle color picker color change."""
@@ -1289,11 +2114,19 @@ class WhiteboardWindow(Gtk.Window):
         self.app.brush_color = (rgba.red, rgba.green, rgba.blue)
 
     def on_brush_size_changed(self, scale):
-        """Handle brush size change."""
-        size = int(scale.get_value())
+        """Handle brush size change. Rapid changes are applied once per frame."""
+        self._size_pending = int(scale.get_value())
+        if self._size_timer == 0:
+            self._size_timer = GLib.timeout_add(16, self.apply_brush_size)
+
+    def apply_brush_size(self):
+        """Apply the latest brush size from the size scale."""
+        self._size_timer = 0
+        size = self._size_pending
         if self.app.board:
             self.app.board.brush_size = size
         self.size_label.set_text(f"Brush Size: {size}")
+        return False
 
     def on_clear(self, button):
         """Clear the canvas with confirmation."""
@@ -1323,11 +2156,13 @@ class WhiteboardWindow(Gtk.Window):
             filepath = os.path.join(self.save_dir, f"{self.board_name}.json")
 
             # Ensure save directory exists
-            if not os.path.exists(self.save_dir):
-                os.makedirs(self.save_dir)
+            os.makedirs(self.save_dir, exist_ok=True)
 
-            with open(filepath, 'w') as f:
-                json.dump(data, f)
+            # Encode here, while the board can't change under us, and leave
+            # the disk write to the app's save worker. Pending writes still
+            # complete if the app is closed right away
+            payload = dump_json(data)
+            self.app.save_executor.submit(self.write_board_file, filepath, payload)
 
             # Show confirmation
             dialog = Gtk.MessageDialog(
@@ -1341,29 +2176,68 @@ class WhiteboardWindow(Gtk.Window):
             dialog.run()
             dialog.destroy()
 
-    def load_board(self):
-        """Load board data from file."""
+    def write_board_file(self, filepath, payload):
+        """
+        Write an encoded board to disk. Runs on the app's single save worker,
+        so writes happen one at a time. The board is written to a temporary
+        file and renamed over the old save, which readers never see half
+        written.
+        """
+        tmp_path = filepath + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, filepath)
+        except OSError as e:
+            GLib.idle_add(self.on_save_failed, e)
+
+    def on_save_failed(self, error):
+        """Tell the user a background save didn't reach the disk."""
+        print(f"Failed to save board: {error}")
+        # The board window may have been closed while the write was queued
+        dialog = Gtk.MessageDialog(
+            transient_for=self.app.active_window or self.main_menu,
+            flags=0,
+            message_type=Gtk.MessageType.ERROR,
+            buttons=Gtk.ButtonsType.OK,
+            text="Save Failed"
+        )
+        dialog.format_secondary_text(f"Board '{self.board_name}' could not be saved: {error}")
+        dialog.run()
+        dialog.destroy()
+        return False
+
+    def read_board(self):
+        """
+        Read the board file and apply its saved theme. Returns the board
+        data, or None if there is no readable save.
+        """
         filepath = os.path.join(self.save_dir, f"{self.board_name}.json")
         if os.path.exists(filepath):
             try:
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
+                with open(filepath, 'rb') as f:
+                    data = load_json(f.read())
 
                 self.app.dark_mode = data.get('dark_mode', False)
                 self.app.bg_color = tuple(data.get('bg_color', (1.0, 1.0, 1.0)))
                 self.app.brush_color = tuple(data.get('brush_color', (0.0, 0.0, 0.0)))
+                return data
+            except Exception as e:
+                print(f"Failed to load board: {e}")
+        return None
 
-                if self.app.board:
-                    self.app.board.load_board_data(data)
+    def load_board(self, data):
+        """Load the board's content from data read by read_board(). Used as an idle callback."""
+        if self.app.board:
+            try:
+                self.app.board.load_board_data(data)
             except Exception as e:
                 print(f"Failed to load board: {e}")
+        return False
 
     def on_toggle_sidebar(self, item):
         """Toggle sidebar visibility."""
-        if self.sidebar.get_visible():
-            self.sidebar.hide()
-        else:
-            self.sidebar.show()
+        self.sidebar.set_visible(not self.sidebar.get_visible())
 
     def on_back_to_menu(self, item):
         """Go back to main menu."""
@@ -1417,29 +2291,67 @@ class WhiteboardWindow(Gtk.Window):
                 self.app.board.add_image(pixbuf, center_x - pixbuf.get_width() / 2, center_y - pixbuf.get_height() / 2)
 
     def on_drag_data_received(self, widget, drag_context, x, y, data, info, time):
-        """Handle dropped files."""
-        if data and data.get_uris():
-            for uri in data.get_uris():
-                # Convert URI to file path
-                if uri.startswith("file://"):
-                    filepath = uri[7:]
-                    # URL decode the path
-                    import urllib.parse
-                    filepath = urllib.parse.unquote(filepath)
-
-                    try:
-                        pixbuf = GdkPixbuf.Pixbuf.new_from_file(filepath)
-                        if pixbuf:
-                            wx, wy = self.app.board.screen_to_world(x, y)
-                            self.app.board.add_image(pixbuf, wx, wy)
-                    except Exception as e:
-                        print(f"Failed to load image: {e}")
+        """Handle dropped files. Images are read and decoded asynchronously."""
+        uris = data.get_uris() if data else None
+        if not uris:
+            return
+        # Convert file URIs to decoded paths in one pass
+        unquote = urllib.parse.unquote
+        paths = [unquote(uri[7:]) for uri in uris if uri.startswith("file://")]
+        position = self.app.board.screen_to_world(x, y)
+        on_opened = self.on_dropped_file_opened
+        for filepath in paths:
+            Gio.File.new_for_path(filepath).read_async(
+                GLib.PRIORITY_DEFAULT, None, on_opened, position)
+
+    def on_dropped_file_opened(self, file, result, position):
+        """Start decoding a dropped file once it has been opened."""
+        try:
+            stream = file.read_finish(result)
+        except GLib.Error as e:
+            print(f"Failed to load image: {e.message}")
+            return
+        GdkPixbuf.Pixbuf.new_from_stream_async(stream, None, self.on_dropped_image_loaded, position)
+
+    def on_dropped_image_loaded(self, stream, result, position):
+        """Scale a decoded dropped image on a worker thread."""
+        try:
+            pixbuf = GdkPixbuf.Pixbuf.new_from_stream_finish(result)
+        except GLib.Error as e:
+            print(f"Failed to load image: {e.message}")
+            return
+        finally:
+            stream.close_async(GLib.PRIORITY_DEFAULT, None, None)
+        if pixbuf:
+            future = self.app.image_executor.submit(prepare_image, pixbuf)
+            future.add_done_callback(lambda f: GLib.idle_add(self.on_dropped_image_prepared, f, position))
+
+    def on_dropped_image_prepared(self, future, position):
+        """Add a scaled dropped image at the drop position, back on the main loop."""
+        try:
+            mips = future.result()
+        except Exception as e:
+            print(f"Failed to load image: {e}")
+            return False
+        if self.app.board:
+            self.app.board.add_image(mips[0], *position, mips=mips)
+        return False
+
+    def on_focus_in(self, widget, event):
+        """Remember this window as the parent for the app's dialogs."""
+        self.app.active_window = self
+        return False
 
     def on_close(self, widget, event):
         """Handle window close."""
         self.main_menu.show_all()
         return False
 
+    def on_destroy(self, widget):
+        """Stop parenting dialogs to this window, however it was closed."""
+        if self.app.active_window is self:
+            self.app.active_window = None
+
 
 class WhiteboardApp:
     """Main application class."""
@@ -1452,10 +2364,17 @@ class WhiteboardApp:
         self.sidebar_visible = True
         self.current_tool = 'brush'  # 'brush', 'shape', 'text'
         self.current_shape_type = 'rect'  # 'rect', 'circle', 'triangle', 'arrow'
+        self.active_window = None  # whiteboard window that last had focus
+        # Scales dropped images off the main thread
+        self.image_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        # Writes saved boards off the main thread, one at a time
+        self.save_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 
     def run(self):
         """Run the application."""
         self.main_menu = MainMenuWindow(self)
+        # Compile the spline kernel while the menu sits idle
+        GLib.idle_add(load_spline_kernel, priority=GLib.PRIORITY_LOW)
         Gtk.main()
 
     def open_whiteboard(self, main_menu, board_name, dark_mode=False, is_new=True):
@@ -1464,16 +2383,9 @@ class WhiteboardApp:
 
     def show_text_input_dialog(self, x, y):
         """Show a dialog to input text."""
-        # Get the active window
-        active_window = None
-        for window in Gtk.Window.list_toplevels():
-            if window.is_active():
-                active_window = window
-                break
-
         dialog = Gtk.Dialog(
             title="Enter Text",
-            transient_for=active_window,
+            transient_for=self.active_window,
             flags=0
         )
         dialog.add_buttons(